@@ -1,29 +1,37 @@
+import asyncio
+import csv
+import html
+import io
+from collections import Counter
 import streamlit as st
 import pandas as pd
-from verifier import verify_document
+
+
+VERDICT_COLORS = {
+    "Verified": "#28a745",
+    "Inaccurate": "#dc3545",
+    "False": "#dc3545",
+    "Outdated": "#ffc107",
+    "Unverifiable": "#6c757d",
+    "Error": "#dc3545"
+}
+DEFAULT_VERDICT_COLOR = "#6c757d"
+CSV_FIELDNAMES = ["Original Claim", "Verdict", "Correction/Evidence", "Source URL"]
 
 
 def get_verdict_color(verdict: str) -> str:
-    color_map = {
-        "Verified": "#28a745",
-        "Inaccurate": "#dc3545",
-        "False": "#dc3545",
-        "Outdated": "#ffc107",
-        "Unverifiable": "#6c757d",
-        "Error": "#dc3545"
-    }
-    return color_map.get(verdict, "#6c757d")
+    return VERDICT_COLORS.get(verdict, DEFAULT_VERDICT_COLOR)
 
 
 def style_dataframe(df: pd.DataFrame) -> str:
-    styles = []
-    for idx, row in df.iterrows():
-        color = get_verdict_color(row['Verdict'])
-        styles.append({
-            'selector': f'tbody tr:nth-child({idx+1})',
+    colors = df['Verdict'].map(VERDICT_COLORS).fillna(DEFAULT_VERDICT_COLOR).to_numpy()
+    return [
+        {
+            'selector': f'tbody tr:nth-child({i+1})',
             'props': [('background-color', f'{color}22')]
-        })
-    return styles
+        }
+        for i, color in enumerate(colors)
+    ]
 
 
 def main():
@@ -53,9 +61,11 @@ def main():
         st.success(f"File uploaded: {uploaded_file.name}")
         
         if st.button("Start Verification", type="primary"):
+            from verifier import verify_document
+            
             try:
                 with st.spinner("Processing document and verifying claims..."):
-                    results = verify_document(uploaded_file, gemini_key, tavily_key)
+                    results = asyncio.run(verify_document(uploaded_file, gemini_key, tavily_key))
                 
                 if not results:
                     st.warning("No verifiable claims were extracted from the document.")
@@ -75,15 +85,14 @@ def main():
                         "Source URL": result.source_url
                     })
                 
-                df = pd.DataFrame(df_data)
-                
                 col1, col2, col3, col4, col5 = st.columns(5)
                 
-                verified_count = len([r for r in results if r.verdict == "Verified"])
-                inaccurate_count = len([r for r in results if r.verdict in ["Inaccurate", "False"]])
-                outdated_count = len([r for r in results if r.verdict == "Outdated"])
-                unverifiable_count = len([r for r in results if r.verdict == "Unverifiable"])
-                error_count = len([r for r in results if r.verdict == "Error"])
+                counts = Counter(r.verdict for r in results)
+                verified_count = counts.get("Verified", 0)
+                inaccurate_count = counts.get("Inaccurate", 0) + counts.get("False", 0)
+                outdated_count = counts.get("Outdated", 0)
+                unverifiable_count = counts.get("Unverifiable", 0)
+                error_count = counts.get("Error", 0)
                 
                 col1.metric("Verified", verified_count)
                 col2.metric("Inaccurate/False", inaccurate_count)
@@ -93,26 +102,35 @@ def main():
                 
                 st.markdown("---")
                 
-                for idx, result in enumerate(results):
+                html_parts = []
+                for result in results:
                     color = get_verdict_color(result.verdict)
-                    
-                    with st.container():
-                        st.markdown(f"""
-                        <div style='padding: 15px; border-left: 5px solid {color}; background-color: {color}15; margin-bottom: 15px; border-radius: 5px;'>
-                            <strong style='color: {color}; font-size: 1.1em;'>{result.verdict}</strong>
-                            <p style='margin: 10px 0;'><strong>Claim:</strong> {result.original_claim}</p>
-                            <p style='margin: 10px 0;'><strong>Evidence:</strong> {result.evidence}</p>
-                            <p style='margin: 10px 0;'><strong>Source:</strong> <a href='{result.source_url}' target='_blank'>{result.source_url}</a></p>
-                        </div>
-                        """, unsafe_allow_html=True)
+                    verdict = html.escape(result.verdict)
+                    claim = html.escape(result.original_claim)
+                    evidence = html.escape(result.evidence)
+                    source_url = html.escape(result.source_url, quote=True)
+                    html_parts.append(f"""
+                    <div style='padding: 15px; border-left: 5px solid {color}; background-color: {color}15; margin-bottom: 15px; border-radius: 5px;'>
+                        <strong style='color: {color}; font-size: 1.1em;'>{verdict}</strong>
+                        <p style='margin: 10px 0;'><strong>Claim:</strong> {claim}</p>
+                        <p style='margin: 10px 0;'><strong>Evidence:</strong> {evidence}</p>
+                        <p style='margin: 10px 0;'><strong>Source:</strong> <a href='{source_url}' target='_blank'>{source_url}</a></p>
+                    </div>
+                    """)
+                
+                st.markdown("".join(html_parts), unsafe_allow_html=True)
                 
                 st.markdown("---")
                 st.subheader("Download Results")
                 
-                csv = df.to_csv(index=False)
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES)
+                writer.writeheader()
+                writer.writerows(df_data)
+                
                 st.download_button(
                     label="Download as CSV",
-                    data=csv,
+                    data=buffer.getvalue(),
                     file_name="fact_check_results.csv",
                     mime="text/csv"
                 )
@@ -1,11 +1,22 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
 import re
-from typing import List, Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, Union
 from pydantic import BaseModel, Field
-from tavily import TavilyClient
-import PyPDF2
+import streamlit as st
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.runnables import Runnable
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from tavily import TavilyClient
+
+
+logger = logging.getLogger(__name__)
 
 
 class ExtractedClaim(BaseModel):
@@ -13,11 +24,31 @@ class ExtractedClaim(BaseModel):
     claim_type: str = Field(description="Type of claim: statistic, date, financial, technical, or factual")
 
 
+@dataclass(slots=True)
+class _FastClaim:
+    claim_text: str
+    claim_type: str
+
+
+Claim = Union[ExtractedClaim, _FastClaim]
+
+
 class ClaimsList(BaseModel):
     claims: List[ExtractedClaim] = Field(description="List of extracted claims")
 
 
-class VerificationResult(BaseModel):
+class ClaimVerdict(BaseModel):
+    index: int = Field(description="The number of the claim this verdict refers to")
+    verdict: str = Field(description="One of: Verified, Inaccurate, Outdated, False, or Unverifiable")
+    evidence: str = Field(description="Brief evidence statement explaining the verdict")
+
+
+class BatchVerdicts(BaseModel):
+    items: List[ClaimVerdict] = Field(description="One verdict per numbered claim")
+
+
+@dataclass(slots=True, frozen=True)
+class VerificationResult:
     original_claim: str
     verdict: str
     evidence: str
@@ -25,25 +56,34 @@ class VerificationResult(BaseModel):
 
 
 def extract_text_from_pdf(pdf_file) -> str:
+    return extract_text_from_pdf_bytes(pdf_file.getvalue())
+
+
+@st.cache_data(show_spinner=False)
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    import pymupdf
+    
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text_content = ""
+        doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            page_texts = [page.get_text("text") for page in doc]
+        finally:
+            doc.close()
         
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_content += page_text + "\n"
+        parts = [page_text for page_text in page_texts if page_text]
+        text_content = "\n".join(parts).strip()
         
-        if not text_content.strip():
+        if not text_content:
             raise ValueError("No text could be extracted from the PDF")
         
-        return text_content.strip()
+        return text_content
     except Exception as e:
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
 
-def extract_claims(text: str, llm: ChatGoogleGenerativeAI) -> List[ExtractedClaim]:
-    parser = PydanticOutputParser(pydantic_object=ClaimsList)
+@functools.lru_cache(maxsize=None)
+def _extract_prompt() -> ChatPromptTemplate:
+    from langchain_core.prompts import ChatPromptTemplate
     
     system_message = """You are a critical fact-checking analyst with expertise in identifying verifiable claims.
 Your task is to extract ONLY atomic, verifiable claims from the provided text.
@@ -64,62 +104,139 @@ IGNORE:
 Be skeptical and precise. Extract each claim as a standalone statement that can be independently verified against external sources.
 Look for claims that could be intentionally misleading, outdated, or factually incorrect."""
 
-    prompt = ChatPromptTemplate.from_messages([
+    return ChatPromptTemplate.from_messages([
         ("system", system_message),
         ("user", "Extract all verifiable claims from this text:\n\n{text}\n\n{format_instructions}")
     ])
+
+
+CLAIM_CHUNK_SIZE = 16000
+CLAIM_CHUNK_OVERLAP = 200
+
+
+def _claim_key(claim_text: str) -> str:
+    return re.sub(r'\s+', ' ', claim_text.lower()).strip()
+
+
+def dedupe_claims(claims: List[Claim]) -> List[Claim]:
+    seen: Dict[str, Claim] = {}
+    for claim in claims:
+        seen.setdefault(_claim_key(claim.claim_text), claim)
+    return list(seen.values())
+
+
+async def extract_claims(text: str, llm: ChatGoogleGenerativeAI, semaphore: asyncio.Semaphore) -> List[Claim]:
+    from langchain_core.output_parsers import PydanticOutputParser
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
     
-    chain = prompt | llm | parser
+    parser = PydanticOutputParser(pydantic_object=ClaimsList)
     
-    try:
-        result = chain.invoke({
-            "text": text,
-            "format_instructions": parser.get_format_instructions()
-        })
-        return result.claims
-    except Exception as e:
-        fallback_claims = extract_claims_fallback(text, llm)
-        return fallback_claims
+    chain = _extract_prompt() | llm | parser
+    
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CLAIM_CHUNK_SIZE,
+        chunk_overlap=CLAIM_CHUNK_OVERLAP
+    )
+    chunks = splitter.split_text(text) or [text]
+    used_fallback = False
+    
+    async def extract_chunk(chunk: str) -> List[Claim]:
+        async with semaphore:
+            try:
+                result = await chain.ainvoke({
+                    "text": chunk,
+                    "format_instructions": parser.get_format_instructions()
+                })
+                return result.claims
+            except Exception:
+                nonlocal used_fallback
+                used_fallback = True
+                return await extract_claims_fallback(chunk, llm)
+    
+    chunk_claims = await asyncio.gather(*[extract_chunk(chunk) for chunk in chunks])
+    
+    claims = [claim for claims in chunk_claims for claim in claims]
+    if not claims and used_fallback:
+        return [_FastClaim(claim_text=text[:200], claim_type="general")]
+    return claims
 
 
-def extract_claims_fallback(text: str, llm: ChatGoogleGenerativeAI) -> List[ExtractedClaim]:
-    prompt = ChatPromptTemplate.from_messages([
+@functools.lru_cache(maxsize=None)
+def _extract_fallback_prompt() -> ChatPromptTemplate:
+    from langchain_core.prompts import ChatPromptTemplate
+    
+    return ChatPromptTemplate.from_messages([
         ("system", "Extract verifiable claims with numbers, dates, or specific facts. Return each claim on a new line starting with 'CLAIM:'."),
         ("user", "{text}")
     ])
-    
-    chain = prompt | llm
-    response = chain.invoke({"text": text})
+
+
+async def extract_claims_fallback(text: str, llm: ChatGoogleGenerativeAI) -> List[_FastClaim]:
+    chain = _extract_fallback_prompt() | llm
+    response = await chain.ainvoke({"text": text})
     
     claims = []
     for line in response.content.split("\n"):
         if line.strip().startswith("CLAIM:"):
             claim_text = line.replace("CLAIM:", "").strip()
             if claim_text:
-                claims.append(ExtractedClaim(
+                claims.append(_FastClaim(
                     claim_text=claim_text,
                     claim_type="factual"
                 ))
     
-    return claims if claims else [ExtractedClaim(claim_text=text[:200], claim_type="general")]
+    return claims
+
 
+SEARCH_CACHE_TTL = 3600
+MIN_BASIC_SEARCH_RESULTS = 2
+MAX_HTTP_CONNECTIONS = 20
 
-def search_claim(claim: str, tavily_client: TavilyClient) -> Dict[str, Any]:
+
+@st.cache_resource(show_spinner=False)
+def _tavily_client(tavily_key: str) -> TavilyClient:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from tavily import TavilyClient
+    
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=MAX_HTTP_CONNECTIONS))
+    return TavilyClient(api_key=tavily_key, session=session)
+
+
+@st.cache_data(ttl=SEARCH_CACHE_TTL, show_spinner=False)
+def _cached_search(query: str, search_depth: str, _tavily_key: str) -> Dict[str, Any]:
+    return _tavily_client(_tavily_key).search(
+        query=query,
+        search_depth=search_depth,
+        max_results=5
+    )
+
+
+async def search_claim(claim: str, tavily_key: str) -> Dict[str, Any]:
     try:
         search_query = formulate_search_query(claim)
-        results = tavily_client.search(
-            query=search_query,
-            search_depth="advanced",
-            max_results=5
-        )
+        results = await asyncio.to_thread(_cached_search, search_query, "basic", tavily_key)
+        if len(results.get("results", [])) < MIN_BASIC_SEARCH_RESULTS:
+            results = await asyncio.to_thread(_cached_search, search_query, "advanced", tavily_key)
         return results
     except Exception as e:
         return {"results": [], "error": str(e)}
 
 
+_NUM_RE = re.compile(r'\d+(?:\.\d+)?(?:\s*(?:million|billion|trillion|percent|%|thousand))?')
+_DATE_RE = re.compile(r'\b(?:19|20)\d{2}\b|\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}\b')
+
+
+def needs_search(claim: str) -> bool:
+    if _NUM_RE.search(claim) or _DATE_RE.search(claim):
+        return True
+    return sum(1 for w in claim.split() if len(w) > 4 and w[0].isupper()) >= 2
+
+
 def formulate_search_query(claim: str) -> str:
-    numbers = re.findall(r'\d+(?:\.\d+)?(?:\s*(?:million|billion|trillion|percent|%|thousand))?', claim)
-    dates = re.findall(r'\b(?:19|20)\d{2}\b|\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b', claim)
+    numbers = _NUM_RE.findall(claim)
+    dates = _DATE_RE.findall(claim)
     
     query_parts = []
     
@@ -138,14 +255,22 @@ def formulate_search_query(claim: str) -> str:
     return " ".join(query_parts)
 
 
-def verify_claim_against_results(claim: str, search_results: Dict[str, Any], llm: ChatGoogleGenerativeAI) -> Dict[str, str]:
-    if "error" in search_results or not search_results.get("results"):
-        return {
-            "verdict": "Unverifiable",
-            "evidence": "Unable to find relevant sources to verify this claim",
-            "source_url": "N/A"
-        }
-    
+VERDICTS = ["Verified", "Inaccurate", "Outdated", "False", "Unverifiable"]
+_VERDICT_RE = re.compile(r'\b(' + '|'.join(VERDICTS) + r')\b', re.IGNORECASE)
+
+VERIFICATION_RULES = """STRICT VERIFICATION RULES:
+1. If numbers in the claim do NOT match the sources, mark as "Inaccurate"
+2. If dates are outdated (claim says 2023 but sources show 2024/2025 data), mark as "Outdated"
+3. If the claim contradicts the evidence, mark as "False"
+4. Only mark as "Verified" if evidence directly supports the claim with matching data
+5. Look for intentional deception, cherry-picked statistics, or misleading context"""
+
+
+def has_search_results(search_results: Dict[str, Any]) -> bool:
+    return "error" not in search_results and bool(search_results.get("results"))
+
+
+def format_search_evidence(search_results: Dict[str, Any]) -> Tuple[str, List[str]]:
     results_text = ""
     source_urls = []
     
@@ -153,36 +278,64 @@ def verify_claim_against_results(claim: str, search_results: Dict[str, Any], llm
         results_text += f"\nSource {idx}: {result.get('content', '')}\n"
         source_urls.append(result.get('url', ''))
     
-    verification_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a skeptical fact-checker analyzing claims against evidence.
+    return results_text, source_urls
 
-STRICT VERIFICATION RULES:
-1. If numbers in the claim do NOT match the sources, mark as "Inaccurate"
-2. If dates are outdated (claim says 2023 but sources show 2024/2025 data), mark as "Outdated"
-3. If the claim contradicts the evidence, mark as "False"
-4. Only mark as "Verified" if evidence directly supports the claim with matching data
-5. Look for intentional deception, cherry-picked statistics, or misleading context
+
+def normalize_verdict(verdict_text: str) -> str:
+    match = _VERDICT_RE.search(verdict_text)
+    return match.group(1).capitalize() if match else "Unverifiable"
+
+
+@functools.lru_cache(maxsize=None)
+def _verify_prompt() -> ChatPromptTemplate:
+    from langchain_core.prompts import ChatPromptTemplate
+    
+    return ChatPromptTemplate.from_messages([
+        ("system", f"""You are a skeptical fact-checker analyzing claims against evidence.
+
+{VERIFICATION_RULES}
 
 Return ONLY one of: Verified, Inaccurate, Outdated, False, or Unverifiable
 Then provide a brief evidence statement explaining your verdict."""),
         ("user", "Claim: {claim}\n\nEvidence from search results:\n{evidence}\n\nProvide verdict and explanation:")
     ])
+
+
+@functools.lru_cache(maxsize=None)
+def _batch_verify_prompt() -> ChatPromptTemplate:
+    from langchain_core.prompts import ChatPromptTemplate
+    
+    return ChatPromptTemplate.from_messages([
+        ("system", f"""You are a skeptical fact-checker analyzing numbered claims against evidence.
+
+{VERIFICATION_RULES}
+
+For every numbered claim return exactly one verdict using the claim's number as its index.
+Each verdict must be one of: Verified, Inaccurate, Outdated, False, or Unverifiable,
+with a brief evidence statement explaining it."""),
+        ("user", "{claims}\n\n{format_instructions}")
+    ])
+
+
+async def verify_claim_against_results(claim: str, search_results: Dict[str, Any], verify_chain: Runnable) -> Dict[str, str]:
+    if not has_search_results(search_results):
+        return {
+            "verdict": "Unverifiable",
+            "evidence": "Unable to find relevant sources to verify this claim",
+            "source_url": "N/A"
+        }
     
-    chain = verification_prompt | llm
+    results_text, source_urls = format_search_evidence(search_results)
     
     try:
-        response = chain.invoke({
+        response = await verify_chain.ainvoke({
             "claim": claim,
             "evidence": results_text
         })
         
         verdict_text = response.content.strip()
         
-        verdict = "Unverifiable"
-        for v in ["Verified", "Inaccurate", "Outdated", "False", "Unverifiable"]:
-            if v.lower() in verdict_text.lower():
-                verdict = v
-                break
+        verdict = normalize_verdict(verdict_text)
         
         evidence = verdict_text.replace(verdict, "").strip()
         if not evidence:
@@ -201,7 +354,82 @@ Then provide a brief evidence statement explaining your verdict."""),
         }
 
 
-def verify_document(pdf_file, google_key: str, tavily_key: str) -> List[VerificationResult]:
+BATCH_VERIFY_SIZE = 20
+
+
+async def verify_claims_batch(claims: List[str], search_results: List[Dict[str, Any]], llm: ChatGoogleGenerativeAI, verify_chain: Runnable, semaphore: asyncio.Semaphore) -> List[Dict[str, str]]:
+    from langchain_core.exceptions import OutputParserException
+    from langchain_core.output_parsers import PydanticOutputParser
+    
+    verifications: List[Optional[Dict[str, str]]] = [None] * len(claims)
+    source_urls: Dict[int, str] = {}
+    claim_blocks: Dict[int, str] = {}
+    
+    for idx, (claim, results) in enumerate(zip(claims, search_results)):
+        if not has_search_results(results):
+            verifications[idx] = {
+                "verdict": "Unverifiable",
+                "evidence": "Unable to find relevant sources to verify this claim",
+                "source_url": "N/A"
+            }
+            continue
+        
+        results_text, urls = format_search_evidence(results)
+        source_urls[idx] = urls[0] if urls else "N/A"
+        claim_blocks[idx] = f"Claim {idx + 1}: {claim}\nEvidence from search results:\n{results_text}"
+    
+    if claim_blocks:
+        parser = PydanticOutputParser(pydantic_object=BatchVerdicts)
+        
+        chain = _batch_verify_prompt() | llm | parser
+        
+        pending = list(claim_blocks)
+        groups = [pending[i:i + BATCH_VERIFY_SIZE] for i in range(0, len(pending), BATCH_VERIFY_SIZE)]
+        
+        async def verify_group(group: List[int]) -> None:
+            async with semaphore:
+                try:
+                    batch = await chain.ainvoke({
+                        "claims": "\n\n".join(claim_blocks[idx] for idx in group),
+                        "format_instructions": parser.get_format_instructions()
+                    })
+                except OutputParserException as e:
+                    logger.warning("Batch verification output could not be parsed, verifying claims individually: %s", e)
+                    return
+                except Exception as e:
+                    logger.warning("Batch verification failed, verifying claims individually: %s", e)
+                    return
+            
+            for item in batch.items:
+                idx = item.index - 1
+                if idx in group and verifications[idx] is None:
+                    verifications[idx] = {
+                        "verdict": normalize_verdict(item.verdict),
+                        "evidence": item.evidence.strip()[:300],
+                        "source_url": source_urls[idx]
+                    }
+        
+        await asyncio.gather(*[verify_group(group) for group in groups])
+    
+    missing = [idx for idx, verification in enumerate(verifications) if verification is None]
+    
+    async def verify_single(idx: int) -> Dict[str, str]:
+        async with semaphore:
+            return await verify_claim_against_results(claims[idx], search_results[idx], verify_chain)
+    
+    fallback = await asyncio.gather(*[verify_single(idx) for idx in missing])
+    for idx, verification in zip(missing, fallback):
+        verifications[idx] = verification
+    
+    return verifications
+
+
+MAX_CONCURRENT_CLAIMS = 10
+
+
+async def verify_document(pdf_file, google_key: str, tavily_key: str) -> List[VerificationResult]:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    
     text = extract_text_from_pdf(pdf_file)
     
     llm = ChatGoogleGenerativeAI(
@@ -210,16 +438,29 @@ def verify_document(pdf_file, google_key: str, tavily_key: str) -> List[Verifica
         google_api_key=google_key
     )
     
-    tavily_client = TavilyClient(api_key=tavily_key)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CLAIMS)
     
-    claims = extract_claims(text, llm)
+    claims = dedupe_claims(await extract_claims(text, llm, semaphore))
+    claim_texts = [claim.claim_text for claim in claims if needs_search(claim.claim_text)]
     
-    results = []
+    async def search(claim_text: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await search_claim(claim_text, tavily_key)
+    
+    search_results = await asyncio.gather(*[search(claim_text) for claim_text in claim_texts])
     
+    verify_chain = _verify_prompt() | llm
+    
+    verifications = await verify_claims_batch(claim_texts, list(search_results), llm, verify_chain, semaphore)
+    verified = dict(zip(claim_texts, verifications))
+    
+    results = []
     for claim in claims:
-        search_results = search_claim(claim.claim_text, tavily_client)
-        verification = verify_claim_against_results(claim.claim_text, search_results, llm)
-        
+        verification = verified.get(claim.claim_text, {
+            "verdict": "Unverifiable",
+            "evidence": "No verifiable facts detected",
+            "source_url": "N/A"
+        })
         results.append(VerificationResult(
             original_claim=claim.claim_text,
             verdict=verification["verdict"],